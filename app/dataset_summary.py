@@ -0,0 +1,174 @@
+import pandas as pd
+from pathlib import Path
+from typing import Optional
+import json
+import logging
+
+
+
+
+
+# Set up logger for dataset_summary.py
+def setup_logger():
+    logger = logging.getLogger("dataset_summary")
+    logger.setLevel(logging.ERROR)
+
+    handler = logging.FileHandler("logs/dataset_summary.log")
+    handler.setLevel(logging.ERROR)
+
+    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+    return logger
+
+
+
+
+logger = setup_logger()
+
+
+
+
+
+
+NUMERIC_STATS = ("mean", "std", "min", "25%", "50%", "75%", "max")
+CURRENT_VERSION_NAME = "current"
+
+# Summaries loaded by this process, keyed by dataset version
+_summary_cache = {}
+
+
+
+
+
+
+def _to_json(value):
+    """Converts pandas/numpy scalars to JSON-safe values."""
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+
+
+
+
+def dataset_version(df: pd.DataFrame) -> str:
+    """
+    Returns a content hash of the dataset, so re-uploading the same data keeps its version.
+
+    Column names and dtypes are part of the hash, so renamed headers get a new version.
+    """
+    row_hash = int(pd.util.hash_pandas_object(df, index=False).sum())
+    schema = tuple((str(col), str(dtype)) for col, dtype in df.dtypes.items())
+    schema_hash = int(pd.util.hash_pandas_object(pd.Series([repr(schema)]), index=False).iloc[0])
+    return format(row_hash ^ schema_hash, "016x")
+
+
+
+
+
+
+def summarize_dataset(df: pd.DataFrame, date_column: Optional[str] = None) -> dict:
+    """
+    Computes per-column statistics for the dataset.
+
+    Every column gets its dtype, count and cardinality. Numeric columns also get
+    mean, std and quantiles, and date columns get their min and max.
+
+    Returns:
+        dict: The summary, including the dataset version and date range.
+    """
+    columns = []
+    for col in df.columns:
+        series = df[col]
+        stats = {
+            "column": str(col),
+            "dtype": str(series.dtype),
+            "count": int(series.count()),
+            "unique": int(series.nunique()),
+        }
+
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            described = series.describe()
+            for key in NUMERIC_STATS:
+                stats[key] = _to_json(described[key])
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            stats["min"] = _to_json(series.min())
+            stats["max"] = _to_json(series.max())
+
+        columns.append(stats)
+
+    date_range = None
+    if date_column is not None:
+        date_range = {
+            "column": str(date_column),
+            "min": _to_json(df[date_column].min()),
+            "max": _to_json(df[date_column].max()),
+        }
+
+    return {
+        "version": dataset_version(df),
+        "rows": len(df),
+        "date_range": date_range,
+        "columns": columns,
+    }
+
+
+
+
+
+
+def write_summary(summary: dict, summary_dir: Path):
+    """
+    Saves the summary as <version>.json and marks it as the current version,
+    so every API worker can serve it. Summaries of older versions are removed.
+    """
+    summary_dir.mkdir(parents=True, exist_ok=True)
+    version = summary["version"]
+
+    with (summary_dir / f"{version}.json").open("w") as buffer:
+        json.dump(summary, buffer, indent=2)
+    (summary_dir / CURRENT_VERSION_NAME).write_text(version)
+
+    for old_summary in summary_dir.glob("*.json"):
+        if old_summary.stem != version:
+            old_summary.unlink()
+
+    # This worker serves the summary it just wrote without reading it back
+    _summary_cache.clear()
+    _summary_cache[version] = summary
+
+
+
+
+
+
+def load_summary(summary_dir: Path) -> Optional[dict]:
+    """
+    Returns the summary of the current dataset version, or None if there is none.
+
+    Only the small version marker is read per call; the summary itself is loaded
+    once per version and then served from memory.
+    """
+    current_path = summary_dir / CURRENT_VERSION_NAME
+    if not current_path.exists():
+        return None
+
+    try:
+        version = current_path.read_text().strip()
+        if version not in _summary_cache:
+            with (summary_dir / f"{version}.json").open() as buffer:
+                summary = json.load(buffer)
+            # Only the current version is kept in memory
+            _summary_cache.clear()
+            _summary_cache[version] = summary
+        return _summary_cache[version]
+    except (OSError, ValueError) as e:
+        logger.error("Error loading dataset summary from %s: %s", summary_dir, e)
+        return None
@@ -0,0 +1,411 @@
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+from pathlib import Path
+from bisect import bisect_left
+from typing import Optional, Tuple
+import json
+import re
+import shutil
+import warnings
+import logging
+
+
+
+
+
+# Set up logger for date_index.py
+def setup_logger():
+    logger = logging.getLogger("date_index")
+    logger.setLevel(logging.ERROR)
+
+    handler = logging.FileHandler("logs/date_index.log")
+    handler.setLevel(logging.ERROR)
+
+    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+    return logger
+
+
+
+
+logger = setup_logger()
+
+
+
+
+
+
+MANIFEST_NAME = "manifest.json"
+UNPARTITIONED_NAME = "all.pkl"
+
+# Column names that hint at a date column; other text columns are never parsed as dates
+DATE_NAME_HINTS = ("date", "day", "time", "month", "period")
+
+MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4, "june": 6, "july": 7,
+    "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+}
+MONTH_ABBREVIATIONS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6, "jul": 7,
+    "aug": 8, "sep": 9, "sept": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+MONTH_YEAR_PATTERN = re.compile(
+    r"\b(" + "|".join(sorted(list(MONTHS) + ["may"] + list(MONTH_ABBREVIATIONS), key=len, reverse=True)) + r")\.?,?\s+((?:19|20)\d{2})\b"
+)
+# "may" is left out on purpose: on its own it is far more often a verb than a month
+MONTH_PATTERN = re.compile(r"\b(" + "|".join(MONTHS) + r")\b")
+ISO_DATE_PATTERN = re.compile(r"\b((?:19|20)\d{2})-(\d{1,2})-(\d{1,2})\b")
+YEAR_PATTERN = re.compile(r"\b((?:19|20)\d{2})\b")
+RELATIVE_PATTERN = re.compile(r"\b(?:last|past|previous)\s+(\d+\s+)?(day|week|month|year)s?\b")
+
+# Words that turn a mentioned date into one end of a range
+OPEN_START_WORDS = ("since", "from", "starting")
+OPEN_END_WORDS = ("until", "till", "to", "through")
+RANGE_END_WORDS = ("and", "to", "until", "till", "through")
+# Words that must come right before a bare year or month name for it to be read as a date
+DATE_CONTEXT_WORDS = (
+    "in", "during", "for", "throughout", "of", "year",
+    "since", "from", "starting", "after", "before", "until", "till", "to", "through", "between", "and",
+)
+
+
+
+
+
+
+def _parse_dates(series: pd.Series) -> Optional[pd.Series]:
+    """
+    Parses a column into datetimes, trying month-first and day-first orders.
+
+    The format is inferred once from the first value and applied to the whole column,
+    so values are parsed consistently. Returns None if neither order parses every value.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)) or series.empty:
+        return None
+
+    first_value = str(series.iloc[0])
+    for dayfirst in (False, True):
+        try:
+            with warnings.catch_warnings():
+                # Guessing a day-first string with dayfirst=False warns; the explicit format is used below
+                warnings.simplefilter("ignore", UserWarning)
+                date_format = guess_datetime_format(first_value, dayfirst=dayfirst)
+                if date_format is None:
+                    continue
+                parsed = pd.to_datetime(series, format=date_format, errors="coerce")
+        except (ValueError, TypeError):
+            continue
+        if parsed.notna().all():
+            return parsed
+
+    return None
+
+
+
+
+
+
+def detect_date_column(df: pd.DataFrame) -> Tuple[Optional[str], Optional[pd.Series]]:
+    """
+    Finds the column holding the dataset's dates and returns it parsed.
+
+    Only datetime columns and columns whose name looks like a date are considered,
+    so free-text columns are never mistaken for dates.
+
+    Returns:
+        tuple: (column name, parsed datetime series), or (None, None) if no column parses.
+    """
+    datetime_columns = [col for col in df.columns if pd.api.types.is_datetime64_any_dtype(df[col])]
+    hinted = [
+        col for col in df.columns
+        if col not in datetime_columns and any(hint in str(col).lower() for hint in DATE_NAME_HINTS)
+    ]
+
+    for col in datetime_columns + hinted:
+        parsed = _parse_dates(df[col])
+        if parsed is not None:
+            return col, parsed
+
+    return None, None
+
+
+
+
+
+
+def sort_by_date(df: pd.DataFrame) -> Tuple[pd.DataFrame, Optional[str]]:
+    """
+    Detects the date column, replaces it with its parsed values and sorts the dataset by it.
+
+    Returns:
+        tuple: (sorted DataFrame, date column name or None).
+    """
+    date_column, parsed = detect_date_column(df)
+    if date_column is None:
+        logger.error("No date column detected; dataset left unsorted.")
+        return df, None
+
+    df = df.copy()
+    df[date_column] = parsed
+    df = df.sort_values(date_column, kind="mergesort").reset_index(drop=True)
+    return df, date_column
+
+
+
+
+
+
+def write_partitions(df: pd.DataFrame, date_column: Optional[str], partition_dir: Path) -> dict:
+    """
+    Stores a date-sorted dataset as one pickle per month, plus a manifest with
+    the row count and min/max date of each partition.
+
+    Any partitions from a previous upload are removed first.
+
+    Returns:
+        dict: The manifest that was written.
+    """
+    if partition_dir.exists():
+        shutil.rmtree(partition_dir)
+    partition_dir.mkdir(parents=True, exist_ok=True)
+
+    partitions = []
+    if date_column is None:
+        df.to_pickle(partition_dir / UNPARTITIONED_NAME)
+        partitions.append({"file": UNPARTITIONED_NAME, "min": None, "max": None, "rows": len(df)})
+    else:
+        months = df[date_column].dt.to_period("M")
+        for month, part in df.groupby(months, sort=True):
+            file_name = f"{month}.pkl"
+            part.reset_index(drop=True).to_pickle(partition_dir / file_name)
+            partitions.append({
+                "file": file_name,
+                "min": part[date_column].iloc[0].isoformat(),
+                "max": part[date_column].iloc[-1].isoformat(),
+                "rows": len(part),
+            })
+
+    manifest = {"date_column": date_column, "columns": [str(col) for col in df.columns], "partitions": partitions}
+    with (partition_dir / MANIFEST_NAME).open("w") as buffer:
+        json.dump(manifest, buffer, indent=2)
+
+    return manifest
+
+
+
+
+
+
+def load_manifest(partition_dir: Path) -> Optional[dict]:
+    """Reads the partition manifest, or returns None if the dataset has not been partitioned."""
+    manifest_path = partition_dir / MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+    with manifest_path.open() as buffer:
+        return json.load(buffer)
+
+
+
+
+
+
+def slice_date_range(df: pd.DataFrame, date_column: Optional[str], start=None, end=None) -> pd.DataFrame:
+    """Returns the rows of a date-sorted DataFrame in [start, end), found by binary search."""
+    if date_column is None or (start is None and end is None):
+        return df
+
+    dates = df[date_column]
+    lo = 0 if start is None else dates.searchsorted(pd.Timestamp(start), side="left")
+    hi = len(df) if end is None else dates.searchsorted(pd.Timestamp(end), side="left")
+    return df.iloc[lo:hi]
+
+
+
+
+
+
+def read_partitions(partition_dir: Path, manifest: dict, start=None, end=None) -> pd.DataFrame:
+    """
+    Reads the rows whose date falls in [start, end) from the partitioned dataset.
+
+    Partitions are picked by binary search over their min/max dates, and rows are
+    cut from the first and last partition by binary search over the sorted date column,
+    so partitions outside the range are never opened.
+    """
+    partitions = manifest["partitions"]
+    date_column = manifest["date_column"]
+
+    if date_column is None or (start is None and end is None):
+        selected = partitions
+    else:
+        maxes = [pd.Timestamp(part["max"]) for part in partitions]
+        mins = [pd.Timestamp(part["min"]) for part in partitions]
+        first = 0 if start is None else bisect_left(maxes, pd.Timestamp(start))
+        last = len(partitions) if end is None else bisect_left(mins, pd.Timestamp(end))
+        selected = partitions[first:last]
+
+    frames = []
+    for part in selected:
+        df = pd.read_pickle(partition_dir / part["file"])
+        frames.append(slice_date_range(df, date_column, start, end))
+
+    if not frames:
+        # An empty slice of a real partition keeps the column dtypes, e.g. the parsed date column
+        if not partitions:
+            return pd.DataFrame(columns=manifest["columns"])
+        return pd.read_pickle(partition_dir / partitions[0]["file"]).iloc[0:0]
+
+    return pd.concat(frames, ignore_index=True)
+
+
+
+
+
+
+def _month_range(year: int, month: int) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    start = pd.Timestamp(year=year, month=month, day=1)
+    return start, start + pd.DateOffset(months=1)
+
+
+def _find_date_mentions(text: str, data_max: pd.Timestamp) -> list:
+    """
+    Finds the dates mentioned in a lower-cased prompt, in the order they appear.
+
+    Returns:
+        list: (qualifier, start, end) per mention, where qualifier is the word right before
+        the date (e.g. "since", "before") and [start, end) is the period the date names.
+    """
+    found = []
+    taken = []
+
+    def add(match, period):
+        if any(match.start() < end and start < match.end() for start, end in taken):
+            return
+        taken.append((match.start(), match.end()))
+        preceding = re.search(r"(\w+)\s*$", text[:match.start()])
+        found.append((match.start(), preceding.group(1) if preceding else "", period))
+
+    for match in ISO_DATE_PATTERN.finditer(text):
+        year, month, day = (int(group) for group in match.groups())
+        try:
+            start = pd.Timestamp(year=year, month=month, day=day)
+        except ValueError:
+            continue
+        add(match, (start, start + pd.Timedelta(days=1)))
+
+    for match in MONTH_YEAR_PATTERN.finditer(text):
+        name, year = match.groups()
+        add(match, _month_range(int(year), MONTHS.get(name) or MONTH_ABBREVIATIONS[name]))
+
+    for match in MONTH_PATTERN.finditer(text):
+        # Month names are common in campaign names ("the August Sale"), so a month
+        # without a year only counts when a date word comes right before it
+        preceding = re.search(r"(\w+)\s*$", text[:match.start()])
+        if not preceding or preceding.group(1) not in DATE_CONTEXT_WORDS:
+            continue
+        # Most recent occurrence of the month within the dataset
+        month = MONTHS[match.group(1)]
+        add(match, _month_range(data_max.year if month <= data_max.month else data_max.year - 1, month))
+
+    for match in RELATIVE_PATTERN.finditer(text):
+        count, unit = match.groups()
+        count = int(count) if count and count.strip() else 1
+        end = data_max.normalize() + pd.Timedelta(days=1)
+        if unit == "day":
+            offset = pd.DateOffset(days=count)
+        elif unit == "week":
+            offset = pd.DateOffset(weeks=count)
+        elif unit == "month":
+            offset = pd.DateOffset(months=count)
+        else:
+            offset = pd.DateOffset(years=count)
+        add(match, (end - offset, end))
+
+    for match in YEAR_PATTERN.finditer(text):
+        # Bare numbers like "2022 clicks" are only years when a date word comes right before them
+        preceding = re.search(r"(\w+)\s*$", text[:match.start()])
+        if preceding and preceding.group(1) in DATE_CONTEXT_WORDS:
+            year = int(match.group(1))
+            add(match, (pd.Timestamp(year=year, month=1, day=1), pd.Timestamp(year=year + 1, month=1, day=1)))
+
+    return [(qualifier, period[0], period[1]) for _, qualifier, period in sorted(found, key=lambda item: item[0])]
+
+
+def extract_date_range(prompt: str, manifest: Optional[dict]) -> Optional[Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]]:
+    """
+    Finds the date range a prompt refers to, as a half-open [start, end) pair.
+
+    Recognises ISO dates, "March 2023", months and years after a date word ("in March", "in 2022")
+    and "last N days/weeks/months/years". "since/from/after" open the start of a range,
+    "before/until/to" bound its end, and "between X and Y" / "from X to Y" give both ends.
+    Months without a year and relative periods are resolved against the latest date in the
+    dataset rather than today, since uploaded reports are usually historical.
+
+    Returns:
+        tuple or None: (start, end), where either end may be None for an open range.
+        None if the prompt names no date, is ambiguous (several unrelated dates), or the
+        range would select no rows or all of them, in which case the whole dataset should be used.
+    """
+    if not manifest or manifest.get("date_column") is None or not manifest["partitions"]:
+        return None
+
+    partitions = manifest["partitions"]
+    data_min = pd.Timestamp(partitions[0]["min"])
+    data_max = pd.Timestamp(partitions[-1]["max"])
+    mentions = _find_date_mentions(prompt.lower(), data_max)
+
+    if len(mentions) == 1:
+        qualifier, period_start, period_end = mentions[0]
+        if qualifier in OPEN_START_WORDS:
+            start, end = period_start, None
+        elif qualifier == "after":
+            start, end = period_end, None
+        elif qualifier == "before":
+            start, end = None, period_start
+        elif qualifier in OPEN_END_WORDS:
+            start, end = None, period_end
+        elif qualifier in RANGE_END_WORDS or qualifier == "between":
+            # "... and 2023" or "between March" on its own is not a usable range
+            return None
+        else:
+            start, end = period_start, period_end
+    elif len(mentions) == 2 and mentions[0][0] in ("between", "from") and mentions[1][0] in RANGE_END_WORDS:
+        start, end = mentions[0][1], mentions[1][2]
+    else:
+        if mentions:
+            logger.error("Prompt mentions %d dates without a clear range; using all rows: %s", len(mentions), prompt)
+        return None
+
+    # Ignore ranges that are empty or would not prune anything
+    effective_start = data_min if start is None else start
+    effective_end = data_max + pd.Timedelta(1) if end is None else end
+    if effective_start >= effective_end:
+        return None
+    if effective_start <= data_min and effective_end > data_max:
+        return None
+    if not any(pd.Timestamp(part["min"]) < effective_end and pd.Timestamp(part["max"]) >= effective_start for part in partitions):
+        logger.error("Date range %s - %s from prompt has no rows; using all rows.", start, end)
+        return None
+
+    return start, end
+
+
+
+
+
+
+def describe_date_range(date_range) -> Optional[dict]:
+    """Returns the applied date range in a JSON-safe form, end exclusive, for API responses."""
+    if date_range is None:
+        return None
+    start, end = date_range
+    return {
+        "start": None if start is None else start.isoformat(),
+        "end": None if end is None else end.isoformat(),
+    }
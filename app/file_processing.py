@@ -4,6 +4,8 @@ from typing import List, Optional
 import os
 import logging
 from fastapi import HTTPException
+from .date_index import sort_by_date, write_partitions, load_manifest, read_partitions
+from .dataset_summary import summarize_dataset, write_summary, load_summary
 
 
 
@@ -35,6 +37,8 @@ logger = setup_logger()
 
 RUNTIME_DIR = Path("runtime")
 concatenated_file_path = RUNTIME_DIR / "concatenated_file.xlsx"
+PARTITION_DIR = RUNTIME_DIR / "partitions"
+SUMMARY_DIR = RUNTIME_DIR / "summary"
 
 
 
@@ -101,10 +105,19 @@ def validate_and_concatenate_files(file_paths: List[Path], output_dir: Path) ->
             logger.error("Empty values found in the concatenated dataframe.")  # Log the error
             raise ValueError("The concatenated dataframe contains empty values. Please clean the data.")
 
+        # Parse the date column once and keep the dataset sorted by it
+        concatenated_df, date_column = sort_by_date(concatenated_df)
+
         # Save to RUNTIME_DIR instead of UPLOAD_DIR
         output_file_path = RUNTIME_DIR / "concatenated_file.xlsx"
         concatenated_df.to_excel(output_file_path, index=False)
 
+        # Monthly partitions with min/max dates, used to answer date-bounded queries
+        write_partitions(concatenated_df, date_column, PARTITION_DIR)
+
+        # Column statistics served by /dataset/summary, computed once per upload
+        write_summary(summarize_dataset(concatenated_df, date_column), SUMMARY_DIR)
+
         # Optionally delete the individual uploaded files after concatenation
         for file_path in file_paths:
             os.remove(file_path)
@@ -125,14 +138,63 @@ def validate_and_concatenate_files(file_paths: List[Path], output_dir: Path) ->
 
 
 
-def read_concatenated_file() -> Optional[pd.DataFrame]:
-    """Reads the concatenated Excel file and returns a DataFrame."""
+def read_concatenated_file(start=None, end=None) -> Optional[pd.DataFrame]:
+    """
+    Reads the concatenated dataset and returns a DataFrame.
+
+    When the dataset has been partitioned by date only the rows in [start, end) are read,
+    otherwise the whole Excel file is returned.
+    """
     try:
+        manifest = load_manifest(PARTITION_DIR)
+        if manifest is not None:
+            return read_partitions(PARTITION_DIR, manifest, start, end)
+
         df = pd.read_excel(concatenated_file_path)
         return df
     except Exception as e:
         logger.error("Error reading the concatenated file: %s",e)
         return None
-    
 
- 
\ No newline at end of file
+
+
+
+
+def read_dataset_manifest() -> Optional[dict]:
+    """Returns the partition manifest of the concatenated dataset, if there is one."""
+    try:
+        return load_manifest(PARTITION_DIR)
+    except Exception as e:
+        logger.error("Error reading the partition manifest: %s", e)
+        return None
+
+
+
+
+
+def read_dataset_summary() -> Optional[dict]:
+    """
+    Returns the precomputed column statistics of the concatenated dataset, if there is one.
+
+    Datasets uploaded before summaries existed get theirs computed and stored on first request.
+    """
+    try:
+        summary = load_summary(SUMMARY_DIR)
+        if summary is not None or not concatenated_file_path.exists():
+            return summary
+
+        df = read_concatenated_file()
+        if df is None:
+            return None
+
+        manifest = load_manifest(PARTITION_DIR)
+        if manifest is not None:
+            date_column = manifest["date_column"]
+        else:
+            df, date_column = sort_by_date(df)
+
+        write_summary(summarize_dataset(df, date_column), SUMMARY_DIR)
+        return load_summary(SUMMARY_DIR)
+    except Exception as e:
+        logger.error("Error computing the dataset summary: %s", e)
+        return None
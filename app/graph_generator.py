@@ -1,9 +1,8 @@
-import openai
 import pandas as pd
-import matplotlib.pyplot as plt
 from io import BytesIO
 import base64
 from fastapi import HTTPException
+import threading
 import logging
 
 
@@ -34,31 +33,48 @@ logger = setup_logger()
 
 
 
+# pyplot keeps global figure state, so concurrent charts (e.g. from /query/batch) are drawn one at a time
+_plot_lock = threading.Lock()
 
-def generate_visualization_code(prompt, data_sample):
+
+
+
+
+
+def generate_visualization_code(prompt, data_sample, date_column=None):
     """
     Generates Python code for data visualization based on a user prompt.
 
     Args:
         prompt (str): User's prompt describing the desired visualization.
         data_sample (str): String representation of the data (first few rows).
+        date_column (str, optional): Date column already parsed to datetime at ingest.
 
     Returns:
         str: Python code for the visualization.
     """
+    if date_column:
+        # The date column is parsed and sorted at ingest, so the chart code must not re-parse it
+        date_instructions = f"The '{date_column}' column is already a datetime column and the data is sorted by it. Do not convert it with pd.to_datetime and do not sort the data again."
+    else:
+        date_instructions = """Also mention code to convert date columns to month-date-year format format to if needed.
+    should handle this error : Visualization Execution Failed: time data 13-01-2022 doesn't match format %m-%d-%Y, at position 12. You might want to try: - passing `format` if your strings have a consistent format; - passing `format='ISO8601'` if your strings are all ISO8601 but not necessarily in exactly the same format; - passing `format='mixed'`, and the format will be inferred for each element individually. You might want to use `dayfirst` alongside this."""
+
     user_query = f"""
     Here is a sample of the dataset:
     {data_sample}
 
     Generate Python code for the following visualization. 
     Use the variable name 'data' for the dataset. 
-    Also mention code to convert date columns to month-date-year format format to if needed.
-    should handle this error : Visualization Execution Failed: time data 13-01-2022 doesn't match format %m-%d-%Y, at position 12. You might want to try: - passing `format` if your strings have a consistent format; - passing `format='ISO8601'` if your strings are all ISO8601 but not necessarily in exactly the same format; - passing `format='mixed'`, and the format will be inferred for each element individually. You might want to use `dayfirst` alongside this.
+    {date_instructions}
     Return only the code with plt.plot:
     {prompt}
     """
 
     try:
+        # openai is imported on first use to keep API startup light
+        import openai
+
         response =openai.chat.completions.create(
             model="gpt-3.5-turbo",
             messages=[
@@ -101,17 +117,24 @@ def execute_visualization_code(code, data):
         str: Base64-encoded image of the plot.
     """
     try:
+        # matplotlib is imported on first use to keep API startup light.
+        # Charts are drawn from worker threads, so use the non-GUI backend before pyplot picks one.
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
         # Define a local scope for the code execution
         local_scope = {"data": data, "plt": plt, "pd":pd}
 
-        # Execute the code
-        exec(code, {}, local_scope)
+        with _plot_lock:
+            # Execute the code
+            exec(code, {}, local_scope)
 
-        # Save the plot to a BytesIO object
-        buf = BytesIO()
-        plt.savefig(buf, format="png")
-        buf.seek(0)
-        plt.close()
+            # Save the plot to a BytesIO object
+            buf = BytesIO()
+            plt.savefig(buf, format="png")
+            buf.seek(0)
+            plt.close()
 
         # Encode the image to Base64
         image_base64 = base64.b64encode(buf.read()).decode('utf-8')
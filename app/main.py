@@ -1,10 +1,13 @@
 from fastapi import FastAPI, Query, UploadFile, File, HTTPException
 from pathlib import Path
 from typing import List
-from app.file_processing import save_uploaded_file, validate_and_concatenate_files, read_concatenated_file
-from .query_handler import handle_user_query
+from app.file_processing import save_uploaded_file, validate_and_concatenate_files, read_concatenated_file, read_dataset_manifest, read_dataset_summary
+from .date_index import extract_date_range, slice_date_range, describe_date_range
+from .query_handler import handle_user_query, identify_relevant_columns_batch
 from .graph_generator import generate_visualization_code, execute_visualization_code
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+import asyncio
+import time
 import logging
 
 
@@ -45,6 +48,23 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 
 
 
+VISUALIZATION_KEYWORDS = ["plot", "visualize", "graph", "chart"]
+
+# Limits for /query/batch
+MAX_BATCH_PROMPTS = 60
+MAX_BATCH_CONCURRENCY = 8
+
+
+
+
+def is_visualization_prompt(prompt: str) -> bool:
+    """Checks if the prompt asks for a chart rather than a text answer."""
+    return any(keyword in prompt.lower() for keyword in VISUALIZATION_KEYWORDS)
+
+
+
+
+
 
 @app.post("/upload/")
 async def upload_files(files: List[UploadFile] = File(...)):
@@ -66,6 +86,24 @@ async def upload_files(files: List[UploadFile] = File(...)):
         logger.error("Error during file concatenation: %s", str(e))
         raise HTTPException(status_code=500, detail=f"Concatenation failed: {str(e)}")
 
+@app.get("/dataset/summary")
+def dataset_summary():
+    """
+    Returns per-column statistics of the concatenated dataset, computed once at upload.
+
+    A plain def so FastAPI runs it in the threadpool: building a missing summary reads the whole dataset.
+    """
+    summary = read_dataset_summary()
+    if summary is None:
+        logger.error("Dataset summary requested before any file was uploaded.")
+        raise HTTPException(status_code=404, detail="No concatenated file found.")
+    return summary
+
+
+
+
+
+
 class QueryRequest(BaseModel):
     prompt: str
 
@@ -81,26 +119,38 @@ async def query_data(request: QueryRequest):
     Endpoint to query the concatenated ad campaign data or generate visualizations.
     """
     try:
-        df = read_concatenated_file()
+        # Only load the partitions covering the dates the prompt asks about
+        manifest = read_dataset_manifest()
+        date_range = extract_date_range(request.prompt, manifest)
+        start, end = date_range if date_range else (None, None)
+
+        df = await asyncio.to_thread(read_concatenated_file, start, end)
+        if df is not None and date_range is not None and df.empty:
+            # No rows in the requested dates; let the LLM see the whole dataset instead
+            date_range = None
+            df = await asyncio.to_thread(read_concatenated_file)
         if df is None:
             logger.error("No concatenated file found when processing query: %s", request.prompt)
             raise HTTPException(status_code=404, detail="No concatenated file found.")
         
         # Check if the prompt is related to visualization
-        if any(keyword in request.prompt.lower() for keyword in ["plot", "visualize", "graph", "chart"]):
+        if is_visualization_prompt(request.prompt):
             # Generate and execute visualization code 
 
             data_sample = df.head(5).to_string(index=False)  # Provide a sample of the data
-            visualization_code = generate_visualization_code(request.prompt, data_sample)
-            image_base64 = execute_visualization_code(visualization_code, df)
+            date_column = manifest.get("date_column") if manifest else None
+            # LLM calls and drawing run in worker threads so they never block the event loop,
+            # which also serves the items of any running /query/batch
+            visualization_code = await asyncio.to_thread(generate_visualization_code, request.prompt, data_sample, date_column)
+            image_base64 = await asyncio.to_thread(execute_visualization_code, visualization_code, df)
             logger.info("Visualization generated successfully for prompt: %s", request.prompt)
-            return {"response": "Visualization generated successfully.", "image": image_base64}
+            return {"response": "Visualization generated successfully.", "image": image_base64, "date_range": describe_date_range(date_range)}
 
         else:
             # Handle as a regular query
-            response = handle_user_query(request.prompt, df)
+            response = await asyncio.to_thread(handle_user_query, request.prompt, df)
             logger.info("Query handled successfully for prompt: %s", request.prompt)
-            return {"response": response}
+            return {"response": response, "date_range": describe_date_range(date_range)}
 
     except Exception as e:
         logger.error("Error processing query '%s': %s", request.prompt, str(e))
@@ -108,3 +158,101 @@ async def query_data(request: QueryRequest):
 
 
 
+
+
+
+
+class BatchQueryRequest(BaseModel):
+    prompts: List[str]
+    max_concurrency: int = Field(4, ge=1, le=MAX_BATCH_CONCURRENCY)
+
+
+
+
+
+
+async def run_batch_item(prompt, df, manifest, semaphore, relevant_columns=None):
+    """
+    Answers one prompt of a batch against the already loaded dataset.
+
+    relevant_columns comes from the batch's shared column selection; if it is None
+    the columns are selected for this prompt on its own.
+    Errors are returned in the item instead of failing the whole batch.
+    """
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            date_column = manifest.get("date_column") if manifest else None
+            date_range = extract_date_range(prompt, manifest)
+            start, end = date_range if date_range else (None, None)
+            data = slice_date_range(df, date_column, start, end)
+            if date_range is not None and data.empty:
+                date_range, data = None, df
+
+            if is_visualization_prompt(prompt):
+                data_sample = data.head(5).to_string(index=False)
+                visualization_code = await asyncio.to_thread(generate_visualization_code, prompt, data_sample, date_column)
+                # Generated code may modify 'data', so it gets its own copy
+                image_base64 = await asyncio.to_thread(execute_visualization_code, visualization_code, data.copy())
+                result = {"response": "Visualization generated successfully.", "image": image_base64, "date_range": describe_date_range(date_range)}
+            else:
+                response = await asyncio.to_thread(handle_user_query, prompt, data, relevant_columns)
+                result = {"response": response, "date_range": describe_date_range(date_range)}
+
+        except HTTPException as he:
+            logger.error("Error processing batch query '%s': %s", prompt, he.detail)
+            result = {"error": str(he.detail)}
+
+        except Exception as e:
+            logger.error("Error processing batch query '%s': %s", prompt, str(e))
+            result = {"error": f"Error processing query: {str(e)}"}
+
+        return {"prompt": prompt, **result, "seconds": round(time.perf_counter() - started, 3)}
+
+
+
+
+
+
+@app.post("/query/batch")
+async def query_batch(request: BatchQueryRequest):
+    """
+    Endpoint to answer many text and chart prompts against a single load of the dataset.
+
+    Columns for all text prompts are selected in one LLM call, repeated prompts are answered
+    once, and prompts run concurrently, at most max_concurrency at a time. Results are
+    returned in the order of the prompts with the time each one took.
+    """
+    if not request.prompts:
+        raise HTTPException(status_code=400, detail="No prompts provided.")
+    if len(request.prompts) > MAX_BATCH_PROMPTS:
+        logger.error("Batch query exceeded limit: %d prompts", len(request.prompts))
+        raise HTTPException(status_code=400, detail=f"You can send a maximum of {MAX_BATCH_PROMPTS} prompts.")
+
+    started = time.perf_counter()
+    manifest = read_dataset_manifest()
+    df = await asyncio.to_thread(read_concatenated_file)
+    if df is None:
+        logger.error("No concatenated file found when processing batch of %d prompts", len(request.prompts))
+        raise HTTPException(status_code=404, detail="No concatenated file found.")
+
+    unique_prompts = list(dict.fromkeys(request.prompts))
+
+    # One column-selection call for every text prompt in the batch
+    columns_by_prompt = {}
+    text_prompts = [prompt for prompt in unique_prompts if not is_visualization_prompt(prompt)]
+    if text_prompts:
+        try:
+            columns_by_prompt = await asyncio.to_thread(identify_relevant_columns_batch, df.columns, text_prompts)
+        except Exception as e:
+            # Items fall back to selecting their own columns
+            logger.error("Batch column selection failed for %d prompts: %s", len(text_prompts), str(e))
+
+    semaphore = asyncio.Semaphore(request.max_concurrency)
+    unique_results = await asyncio.gather(
+        *(run_batch_item(prompt, df, manifest, semaphore, columns_by_prompt.get(prompt)) for prompt in unique_prompts)
+    )
+    results_by_prompt = dict(zip(unique_prompts, unique_results))
+    results = [results_by_prompt[prompt] for prompt in request.prompts]
+
+    return {"results": results, "seconds": round(time.perf_counter() - started, 3)}
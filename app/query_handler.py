@@ -1,13 +1,7 @@
-import openai
-import pandas as pd
 from fastapi import HTTPException
 from .file_processing import read_concatenated_file
-import os
 from dotenv import load_dotenv
-from langchain_experimental.agents import create_pandas_dataframe_agent
-from langchain_openai import ChatOpenAI
 import re
-from sklearn.feature_extraction.text import TfidfVectorizer
 import logging
 
 
@@ -37,25 +31,22 @@ logger = setup_logger()
 
 
 # Load the .env file to read environment variables
+# The OpenAI clients pick up OPENAI_API_KEY from the environment when they are first used
 load_dotenv()
 
 
 
 
 
-
-# Load the OpenAI API key from the .env file
-openai.api_key = os.getenv("OPENAI_API_KEY")
-
-
-
-
-
 # Initialize LangChain LLM
 def create_langchain_agent(df):
     """
     Creates a LangChain agent using the OpenAI API and a Pandas DataFrame.
     """
+    # LangChain is imported on first use to keep API startup light
+    from langchain_experimental.agents import create_pandas_dataframe_agent
+    from langchain_openai import ChatOpenAI
+
     llm = ChatOpenAI(temperature=0.1, model_name="gpt-3.5-turbo") 
     agent = create_pandas_dataframe_agent(llm, df, verbose=True, allow_dangerous_code=True)
     return agent
@@ -87,6 +78,8 @@ def identify_relevant_columns(df_columns, query):
     """
     Asks the LLM to identify relevant columns based on df.columns and query.
     """
+    from langchain_openai import ChatOpenAI
+
     llm = ChatOpenAI(temperature=0.1, model_name="gpt-3.5-turbo")  # Use a lower temperature for more focused responses
     prompt = f"""Here's the df.columns: {df_columns}.
 
@@ -116,19 +109,78 @@ def identify_relevant_columns(df_columns, query):
 
 
 
-def handle_user_query(prompt: str, df) -> str:
+
+
+def identify_relevant_columns_batch(df_columns, queries):
+    """
+    Asks the LLM to identify relevant columns for several queries in a single call.
+
+    Returns:
+        dict: query -> list of columns ([] if out of context). Queries the LLM did not
+        answer usably are left out, so callers can fall back to identify_relevant_columns.
+    """
+    from langchain_openai import ChatOpenAI
+
+    llm = ChatOpenAI(temperature=0.1, model_name="gpt-3.5-turbo")  # Use a lower temperature for more focused responses
+    numbered_queries = "\n".join(f"{number}. {query}" for number, query in enumerate(queries, start=1))
+    prompt = f"""Here's the df.columns: {df_columns}.
+
+    My queries are:
+{numbered_queries}
+
+    For each query separately:
+    If the query is out of context for the DataFrame, return ''.
+    Based on the query, identify all the columns related to the query's context.
+    If the query is about something like 'total cost' or 'average impressions' for a particular entity, 
+    return the entity identifier columns (like campaign_name, campaign_id) and the associated measure columns (like cost, impressions).
+    Only return column names that exactly match those from df.columns, case-sensitive.
+    Better to include all possible relevant columns than to miss some.
+
+    Answer with exactly one line per query, in the form <query number>: <comma-separated column names>"""
+
+    response = llm.predict(prompt) or ""
+    known_columns = {str(col) for col in df_columns}
+
+    columns_by_query = {}
+    for line in response.splitlines():
+        match = re.match(r"\s*(\d+)\s*[:.)]\s*(.*)$", line)
+        if not match or not 1 <= int(match.group(1)) <= len(queries):
+            continue
+        query = queries[int(match.group(1)) - 1]
+        answer = match.group(2).strip()
+        if answer in ("", "''"):
+            columns_by_query[query] = []
+            continue
+        columns = [col.strip().strip("'\"`") for col in answer.split(",")]
+        # Unknown names would make the agent fail, so the query is selected again on its own
+        if columns and all(col in known_columns for col in columns):
+            columns_by_query[query] = columns
+
+    return columns_by_query
+
+
+
+
+
+def handle_user_query(prompt: str, df, relevant_columns=None) -> str:
     """
     Handles the user's query by dynamically selecting relevant columns and sending them to the LLM.
+
+    Columns already selected for this prompt (e.g. shared across a batch) can be passed in
+    as relevant_columns to skip the selection call.
     """
     try:
-        df = read_concatenated_file()
+        # Use the rows already selected by the caller, e.g. the partitions matching the prompt's dates
+        if df is None:
+            df = read_concatenated_file()
         if df is None:
             print("No concatenated file found when processing query: %s", prompt)
             logger.error("Concatenated file not found or unreadable.")
             raise HTTPException(status_code=500, detail="Concatenated file not found or unreadable.")
 
         # Identify relevant columns using the LLM
-        relevant_columns = identify_relevant_columns(df.columns, prompt)
+        if relevant_columns is None:
+            relevant_columns = identify_relevant_columns(df.columns, prompt)
         
         # Check if the query is out of context
         if relevant_columns is None or len(relevant_columns) == 0: 
@@ -0,0 +1,74 @@
+import subprocess
+import sys
+from collections import defaultdict
+
+
+
+
+
+# Usage (from the project root):
+#   python -m app.startup_profile                 # profile the FastAPI app
+#   python -m app.startup_profile streamlit_main  # profile any other module
+DEFAULT_TARGET = "app.main"
+TOP_N = 25
+
+
+
+
+
+
+def profile_imports(target: str = DEFAULT_TARGET) -> list:
+    """
+    Imports the target module in a fresh interpreter with -X importtime.
+
+    Returns:
+        list: (module, self time in us, cumulative time in us) for every imported module.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {target} failed:\n{result.stderr}")
+
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        timings.append((module.strip(), int(self_us), int(cumulative_us)))
+
+    return timings
+
+
+
+
+
+
+def print_report(target: str = DEFAULT_TARGET):
+    """Prints import time per top-level package and the slowest individual modules."""
+    timings = profile_imports(target)
+
+    per_package = defaultdict(int)
+    for module, self_us, _ in timings:
+        per_package[module.split(".")[0]] += self_us
+
+    total_us = sum(per_package.values())
+    print(f"Startup profile for '{target}': {total_us / 1000:.1f} ms across {len(timings)} modules\n")
+
+    print(f"{'package':<40}{'self ms':>12}{'share':>10}")
+    for package, self_us in sorted(per_package.items(), key=lambda item: item[1], reverse=True)[:TOP_N]:
+        print(f"{package:<40}{self_us / 1000:>12.1f}{self_us / max(total_us, 1):>10.1%}")
+
+    print(f"\n{'module':<60}{'cumulative ms':>16}")
+    for module, _, cumulative_us in sorted(timings, key=lambda item: item[2], reverse=True)[:TOP_N]:
+        print(f"{module:<60}{cumulative_us / 1000:>16.1f}")
+
+
+
+
+
+
+if __name__ == "__main__":
+    print_report(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_TARGET)
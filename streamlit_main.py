@@ -4,7 +4,6 @@ from io import BytesIO
 from PIL import Image
 import base64
 import logging
-from app.file_processing import read_concatenated_file
 
 
 
@@ -104,8 +103,18 @@ if uploaded_files:
                     if response.status_code == 200:
                         st.success(f"Files uploaded and concatenated successfully! {response.json()['message']}")
                         st.write("Output file path:", response.json().get("output_file"))
-                        df = read_concatenated_file()
-                        st.write(df.describe().T)
+
+                        # Column statistics are computed by the API at upload time
+                        summary_response = requests.get(f"{API_URL}/dataset/summary")
+                        if summary_response.status_code == 200:
+                            summary = summary_response.json()
+                            st.write(f"Rows: {summary['rows']}")
+                            if summary["date_range"]:
+                                date_range = summary["date_range"]
+                                st.write(f"Date range ({date_range['column']}): {date_range['min']} to {date_range['max']}")
+                            st.dataframe(summary["columns"])
+                        else:
+                            st.error(f"Error loading dataset summary: {summary_response.json()['detail']}")
 
 
 